@@ -1,25 +1,56 @@
 """API Key management"""
-from typing import Optional, Dict
+from typing import Optional, Dict, Set, Tuple
 from datetime import datetime, timedelta
 import hashlib
+import hmac
 import secrets
+import asyncio
+import time
 
-# In-memory storage (replace with database in production)
+_sha256 = hashlib.sha256
+
+# Key format: "key_" + token_urlsafe(16) (always 22 chars) + "_" + secret.
+# The key_id part may itself contain "_", so it is sliced by length.
+_KEY_PREFIX = "key_"
+_KEY_ID_LEN = len(_KEY_PREFIX) + 22
+
+# In-memory storage (replace with database in production).
+# Validation only touches the hot fields, kept in their own compact maps;
+# API_KEYS holds the per-key metadata returned to callers.
+_KEY_HASH: Dict[str, bytes] = {}  # key_id -> sha256(secret) digest
+_KEY_ACTIVE: Set[str] = set()
 API_KEYS: Dict[str, Dict] = {}
 
+# Compared against when the key is malformed or unknown so that every
+# validation path costs one hash and one constant-time compare
+_DUMMY_HASHED_SECRET = _sha256(b"aegis-dummy-secret").digest()
+
+# Keys that already passed validation: api_key -> (key_id, hashed_secret, generation).
+# Lets repeat requests skip re-hashing the secret. Bumping the generation
+# (e.g. on deactivation) invalidates every entry at once.
+_VALIDATED_KEYS: Dict[str, Tuple[str, bytes, int]] = {}
+_VALIDATED_KEYS_MAX = 4096
+_key_generation = 0
+
+# Last-use times buffered as key_id -> time.monotonic() and copied into
+# API_KEYS periodically, keeping datetime writes off the auth path
+_LAST_USED_BUFFER: Dict[str, float] = {}
+_LAST_USED_FLUSH_INTERVAL = 10.0  # seconds
+
 def generate_api_key() -> tuple[str, str]:
     """Generate a new API key pair (key, secret)"""
     key_id = f"key_{secrets.token_urlsafe(16)}"
     secret = secrets.token_urlsafe(32)
     full_key = f"{key_id}_{secret}"
     
-    # Hash the secret for storage
-    hashed = hashlib.sha256(secret.encode()).hexdigest()
+    # Hash the secret for storage (raw digest, no hex round-trip)
+    hashed = _sha256(secret.encode()).digest()
     
     # Store key info
+    _KEY_HASH[key_id] = hashed
+    _KEY_ACTIVE.add(key_id)
     API_KEYS[key_id] = {
         "key_id": key_id,
-        "hashed_secret": hashed,
         "created_at": datetime.utcnow(),
         "last_used": None,
         "rate_limit": 100,  # requests per minute
@@ -32,35 +63,98 @@ def generate_api_key() -> tuple[str, str]:
 async def validate_api_key(api_key: str) -> Optional[Dict]:
     """Validate an API key and return key info"""
     # Parse key format: key_id_secret
-    parts = api_key.split("_", 1)
-    if len(parts) != 2:
+    if api_key.startswith(_KEY_PREFIX) and api_key[_KEY_ID_LEN:_KEY_ID_LEN + 1] == "_":
+        key_id = api_key[:_KEY_ID_LEN]
+        secret = api_key[_KEY_ID_LEN + 1:]
+    else:
+        key_id, secret = None, api_key
+    
+    # Look up key
+    stored = _KEY_HASH.get(key_id) if key_id else None
+    
+    # Verify secret (always hash and compare, even for unknown keys)
+    hashed = _sha256(secret.encode()).digest()
+    if not hmac.compare_digest(hashed, stored or _DUMMY_HASHED_SECRET):
         return None
     
-    key_id, secret = parts
+    if stored is None or key_id not in _KEY_ACTIVE:
+        return None
     
-    # Look up key
-    key_info = API_KEYS.get(key_id)
-    if not key_info or not key_info.get("active"):
+    # Record last use (flushed to API_KEYS in batches)
+    _LAST_USED_BUFFER[key_id] = time.monotonic()
+    
+    # Remember the validated key so repeat requests skip the hash
+    if len(_VALIDATED_KEYS) >= _VALIDATED_KEYS_MAX:
+        _VALIDATED_KEYS.pop(next(iter(_VALIDATED_KEYS)))
+    _VALIDATED_KEYS[api_key] = (key_id, hashed, _key_generation)
+    
+    return API_KEYS[key_id]
+
+def get_cached_api_key(api_key: str) -> Optional[Dict]:
+    """Return key info for a previously validated API key, or None on cache miss"""
+    cached = _VALIDATED_KEYS.get(api_key)
+    if not cached:
         return None
     
-    # Verify secret
-    hashed = hashlib.sha256(secret.encode()).hexdigest()
-    if hashed != key_info["hashed_secret"]:
+    key_id, hashed, generation = cached
+    stored = _KEY_HASH.get(key_id)
+    if (
+        generation != _key_generation
+        or stored is None
+        or key_id not in _KEY_ACTIVE
+        or not hmac.compare_digest(hashed, stored)
+    ):
+        _VALIDATED_KEYS.pop(api_key, None)
         return None
     
-    # Update last used
-    key_info["last_used"] = datetime.utcnow()
+    # Record last use (flushed to API_KEYS in batches)
+    _LAST_USED_BUFFER[key_id] = time.monotonic()
     
-    return key_info
+    return API_KEYS[key_id]
+
+def deactivate_api_key(key_id: str) -> bool:
+    """Deactivate an API key and invalidate cached validations"""
+    global _key_generation
+    
+    key_info = API_KEYS.get(key_id)
+    if not key_info:
+        return False
+    
+    key_info["active"] = False
+    _KEY_ACTIVE.discard(key_id)
+    _key_generation += 1
+    return True
+
+def flush_last_used():
+    """Copy buffered last-use times into API_KEYS"""
+    if not _LAST_USED_BUFFER:
+        return
+    
+    # Convert monotonic timestamps to wall-clock time once per flush
+    offset = time.time() - time.monotonic()
+    buffered = _LAST_USED_BUFFER.copy()
+    _LAST_USED_BUFFER.clear()
+    
+    for key_id, used_at in buffered.items():
+        key_info = API_KEYS.get(key_id)
+        if key_info is not None:
+            key_info["last_used"] = datetime.utcfromtimestamp(used_at + offset)
+
+async def run_last_used_flusher():
+    """Background task that periodically flushes last-use times"""
+    try:
+        while True:
+            await asyncio.sleep(_LAST_USED_FLUSH_INTERVAL)
+            flush_last_used()
+    finally:
+        flush_last_used()
 
 async def get_api_key_info(api_key: str) -> Optional[Dict]:
     """Get API key information without validating"""
-    parts = api_key.split("_", 1)
-    if len(parts) != 2:
+    if not api_key.startswith(_KEY_PREFIX) or api_key[_KEY_ID_LEN:_KEY_ID_LEN + 1] != "_":
         return None
     
-    key_id = parts[0]
-    return API_KEYS.get(key_id)
+    return API_KEYS.get(api_key[:_KEY_ID_LEN])
 
 def create_test_api_key() -> str:
     """Create a test API key for development"""
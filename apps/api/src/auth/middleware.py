@@ -1,45 +1,76 @@
 """API Key authentication middleware"""
-from fastapi import Request, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from .api_keys import validate_api_key, get_api_key_info
+from typing import Iterable, Optional
+from fastapi import status
+from fastapi.responses import ORJSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from .api_keys import validate_api_key, get_cached_api_key
 
-security = HTTPBearer()
+# Paths that don't require an API key
+SKIP_PATHS = frozenset({"/health", "/docs", "/openapi.json", "/redoc"})
 
-async def api_key_middleware(request: Request, call_next):
-    """Middleware to validate API keys"""
-    # Skip auth for health check
-    if request.url.path in ["/health", "/docs", "/openapi.json", "/redoc"]:
-        return await call_next(request)
+class AuthMiddleware:
+    """ASGI middleware to validate API keys
     
-    # Get API key from header
-    api_key = request.headers.get("X-API-Key") or request.headers.get("Authorization", "").replace("Bearer ", "")
-    
-    if not api_key:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="API key required. Provide X-API-Key header or Authorization: Bearer <key>",
-        )
-    
-    # Validate API key
-    key_info = await validate_api_key(api_key)
-    if not key_info:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid API key",
-        )
-    
-    # Check rate limits
-    if not await check_rate_limit(api_key):
-        raise HTTPException(
-            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
-            detail="Rate limit exceeded",
-        )
-    
-    # Attach key info to request state
-    request.state.api_key = api_key
-    request.state.api_key_info = key_info
-    
-    return await call_next(request)
+    Works on the raw ASGI scope: skipped paths go straight to the app and
+    headers are read from scope["headers"] without building a Request.
+    """
+
+    def __init__(self, app: ASGIApp, skip: Iterable[str] = SKIP_PATHS):
+        self.app = app
+        self.skip = frozenset(skip)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        # Skip auth for non-HTTP traffic and public paths
+        if scope["type"] != "http" or scope["path"] in self.skip:
+            return await self.app(scope, receive, send)
+        
+        api_key = _get_api_key(scope["headers"])
+        if not api_key:
+            return await _reject(
+                scope, receive, send,
+                status.HTTP_401_UNAUTHORIZED,
+                "API key required. Provide X-API-Key header or Authorization: Bearer <key>",
+            )
+        
+        # Validate API key (cached keys skip re-hashing the secret)
+        key_info = get_cached_api_key(api_key) or await validate_api_key(api_key)
+        if not key_info:
+            return await _reject(
+                scope, receive, send,
+                status.HTTP_401_UNAUTHORIZED,
+                "Invalid API key",
+            )
+        
+        # Check rate limits
+        if not await check_rate_limit(api_key):
+            return await _reject(
+                scope, receive, send,
+                status.HTTP_429_TOO_MANY_REQUESTS,
+                "Rate limit exceeded",
+            )
+        
+        # Attach key info to request state (read back as request.state.*)
+        state = scope.setdefault("state", {})
+        state["api_key"] = api_key
+        state["api_key_info"] = key_info
+        
+        await self.app(scope, receive, send)
+
+def _get_api_key(headers: Iterable[tuple[bytes, bytes]]) -> Optional[str]:
+    """Extract the API key from raw ASGI headers (X-API-Key, then Bearer token)"""
+    bearer = None
+    for name, value in headers:
+        if name == b"x-api-key":
+            if value:
+                return value.decode("latin-1")
+        elif name == b"authorization" and bearer is None and value.startswith(b"Bearer "):
+            bearer = value[7:].decode("latin-1")
+    return bearer or None
+
+async def _reject(scope: Scope, receive: Receive, send: Send, status_code: int, detail: str):
+    """Send an error response in the same shape as HTTPException"""
+    response = ORJSONResponse({"detail": detail}, status_code=status_code)
+    await response(scope, receive, send)
 
 async def check_rate_limit(api_key: str) -> bool:
     """Check if API key has exceeded rate limit"""
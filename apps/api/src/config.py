@@ -20,6 +20,9 @@ class Settings(BaseSettings):
     # Backend API (existing Express service)
     BACKEND_API_URL: str = "http://localhost:3001"
     
+    # Job storage (uploaded files are passed to workers by path)
+    JOB_STORAGE_DIR: str = "/tmp/aegis-jobs"
+    
     # API Keys
     API_KEY_SECRET: str = "your-secret-key-change-in-production"
     
@@ -27,6 +30,7 @@ class Settings(BaseSettings):
     WEBHOOK_TIMEOUT: int = 30
     WEBHOOK_MAX_RETRIES: int = 3
     WEBHOOK_RETRY_DELAY: int = 5
+    WEBHOOK_RETRY_MAX_DELAY: int = 60
     
     # Rate Limiting
     RATE_LIMIT_ENABLED: bool = True
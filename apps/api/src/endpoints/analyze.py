@@ -1,10 +1,10 @@
 """Document analysis endpoint"""
 from fastapi import APIRouter, UploadFile, File, Request, HTTPException, status
-from fastapi.responses import JSONResponse
 from datetime import datetime, timedelta
-import uuid
+import secrets
 from ..models.schemas import AnalyzeRequest, JobResponse
-from ..jobs.queue import add_analysis_job
+from ..jobs.queue import add_analysis_job, save_job_upload
+from ..jobs.processor import remove_job_file
 
 router = APIRouter()
 
@@ -31,41 +31,59 @@ async def analyze_document(
             detail="Only PDF files are supported",
         )
     
-    # Read file content
-    file_content = await file.read()
-    if len(file_content) == 0:
+    # Get file size without reading the upload into memory
+    file.file.seek(0, 2)
+    file_size = file.file.tell()
+    file.file.seek(0)
+    if file_size == 0:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="File is empty",
         )
     
     # Check file size (50MB limit)
-    if len(file_content) > 50 * 1024 * 1024:
+    if file_size > 50 * 1024 * 1024:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="File too large. Maximum size is 50MB",
         )
     
     # Generate job ID
-    job_id = f"job_{uuid.uuid4().hex[:16]}"
+    job_id = f"job_{secrets.token_hex(8)}"
+    
+    # Move the upload into job storage; read it only if storage is unavailable
+    file_path = None
+    file_content = None
+    try:
+        file_path = await save_job_upload(job_id, file.file)
+    except OSError as e:
+        print(f"⚠️  Job storage unavailable, reading upload into memory: {e}")
+        file.file.seek(0)
+        file_content = await file.read()
     
     # Get API key info for rate limiting
     api_key_info = request.state.api_key_info
     tier = api_key_info.get("tier", "free")
     
     # Estimate completion time based on file size
-    estimated_seconds = max(10, len(file_content) // 100000)  # ~10s per 100KB
+    estimated_seconds = max(10, file_size // 100000)  # ~10s per 100KB
     estimated_completion = datetime.utcnow() + timedelta(seconds=estimated_seconds)
     
     # Add job to queue
-    await add_analysis_job(
-        job_id=job_id,
-        file_content=file_content,
-        filename=file.filename,
-        webhook_url=webhook_url,
-        options=options or {},
-        api_key=request.state.api_key,
-    )
+    try:
+        await add_analysis_job(
+            job_id=job_id,
+            filename=file.filename,
+            file_path=file_path,
+            file_content=file_content,
+            webhook_url=webhook_url,
+            options=options or {},
+            api_key=request.state.api_key,
+        )
+    except Exception:
+        # The job was never queued, so nothing will pick up the stored file
+        remove_job_file(file_path)
+        raise
     
     return JobResponse(
         job_id=job_id,
@@ -2,7 +2,7 @@
 from fastapi import APIRouter
 from ..models.schemas import WebhookRequest, WebhookResponse
 from datetime import datetime
-import uuid
+import secrets
 
 router = APIRouter()
 
@@ -18,7 +18,7 @@ async def create_webhook(request: WebhookRequest):
     - **events**: List of events to subscribe to
     - **secret**: Optional secret for signature verification
     """
-    webhook_id = f"wh_{uuid.uuid4().hex[:16]}"
+    webhook_id = f"wh_{secrets.token_hex(8)}"
     
     WEBHOOKS[webhook_id] = {
         "webhook_id": webhook_id,
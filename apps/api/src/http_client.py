@@ -0,0 +1,36 @@
+"""Shared HTTP client for backend calls and webhook delivery"""
+from typing import Optional
+import httpx
+
+# Global client instance (pooled connections reused across jobs and webhooks)
+http_client: Optional[httpx.AsyncClient] = None
+
+def _create_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=300.0,
+        http2=True,
+        limits=httpx.Limits(max_connections=200, max_keepalive_connections=100),
+    )
+
+async def init_http_client():
+    """Create the shared HTTP client"""
+    global http_client
+    
+    if http_client is None:
+        http_client = _create_client()
+
+async def close_http_client():
+    """Close the shared HTTP client"""
+    global http_client
+    
+    if http_client is not None:
+        await http_client.aclose()
+        http_client = None
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the shared HTTP client, creating it if the app didn't (e.g. standalone workers)"""
+    global http_client
+    
+    if http_client is None:
+        http_client = _create_client()
+    return http_client
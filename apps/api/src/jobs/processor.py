@@ -1,65 +1,101 @@
 """Job processor for analysis tasks"""
-import httpx
 import json
-from typing import Dict, Any
+import asyncio
+import base64
+import os
+from typing import Dict, Any, Optional
 from ..config import settings
+from ..http_client import get_http_client
 from ..webhooks.delivery import deliver_webhook
 
+def remove_job_file(file_path: Optional[str]):
+    """Delete a job's stored upload, ignoring files that are already gone"""
+    if not file_path:
+        return
+    try:
+        os.remove(file_path)
+    except OSError:
+        pass
+
+def _is_final_attempt(job: Any) -> bool:
+    """Whether the queue will not retry this job if the current attempt fails"""
+    if isinstance(job, dict):
+        attempts_made = job.get("attemptsMade", 0)
+        opts = job.get("opts") or {}
+    else:
+        attempts_made = getattr(job, "attemptsMade", 0)
+        opts = getattr(job, "opts", None) or {}
+    return attempts_made + 1 >= opts.get("attempts", 1)
+
 async def process_analysis_job(job: Dict[str, Any]):
     """Process an analysis job"""
     job_id = job["data"]["job_id"]
     filename = job["data"]["filename"]
-    file_content_hex = job["data"]["file_content"]
+    file_path = job["data"].get("file_path")
     webhook_url = job["data"].get("webhook_url")
     options = job["data"].get("options", {})
     
-    # Convert hex back to bytes
-    file_content = bytes.fromhex(file_content_hex)
-    
     try:
         # Call existing backend API
-        async with httpx.AsyncClient(timeout=300.0) as client:
+        client = get_http_client()
+        if file_path:
+            # Stream the stored file instead of loading it into memory
+            with open(file_path, "rb") as f:
+                files = {"file": (filename, f, "application/pdf")}
+                response = await client.post(
+                    f"{settings.BACKEND_API_URL}/api/upload",
+                    files=files,
+                )
+        else:
+            # Fallback: file content inlined as base64 (decoded off the event loop)
+            file_content = await asyncio.to_thread(base64.b64decode, job["data"]["file_content"])
             files = {"file": (filename, file_content, "application/pdf")}
-            
             response = await client.post(
                 f"{settings.BACKEND_API_URL}/api/upload",
                 files=files,
             )
-            
-            if response.status_code != 200:
-                raise Exception(f"Backend API error: {response.text}")
-            
-            result = response.json()
-            
-            # Format result for API response
-            analysis_result = {
-                "job_id": job_id,
-                "status": "completed",
-                "result": {
-                    "document_id": result["document"]["id"],
-                    "filename": result["document"]["filename"],
-                    "risk_level": result["document"]["riskLevel"],
-                    "risk_category": result["document"].get("riskCategory", "None"),
-                    "risk_confidence": result["document"].get("riskConfidence", 0),
-                    "risk_explanation": result["document"].get("riskExplanation", ""),
-                    "recommendations": result["document"].get("recommendations", []),
-                    "num_pages": result["document"]["numPages"],
-                    "num_chunks": result["document"]["numChunks"],
-                    "metadata": {},
-                },
-            }
-            
-            # Deliver webhook if provided
-            if webhook_url:
-                await deliver_webhook(
-                    webhook_url=webhook_url,
-                    event="analysis.completed",
-                    data=analysis_result,
-                )
-            
-            return analysis_result
-            
+        
+        if response.status_code != 200:
+            raise Exception(f"Backend API error: {response.text}")
+        
+        result = response.json()
+        
+        # Format result for API response
+        analysis_result = {
+            "job_id": job_id,
+            "status": "completed",
+            "result": {
+                "document_id": result["document"]["id"],
+                "filename": result["document"]["filename"],
+                "risk_level": result["document"]["riskLevel"],
+                "risk_category": result["document"].get("riskCategory", "None"),
+                "risk_confidence": result["document"].get("riskConfidence", 0),
+                "risk_explanation": result["document"].get("riskExplanation", ""),
+                "recommendations": result["document"].get("recommendations", []),
+                "num_pages": result["document"]["numPages"],
+                "num_chunks": result["document"]["numChunks"],
+                "metadata": {},
+            },
+        }
+        
+        # Backend has processed the file; a retry will no longer need it
+        remove_job_file(file_path)
+        
+        # Deliver webhook if provided
+        if webhook_url:
+            await deliver_webhook(
+                webhook_url=webhook_url,
+                event="analysis.completed",
+                data=analysis_result,
+            )
+        
+        return analysis_result
+        
     except Exception as e:
+        # Keep the file only while the queue still has retries left
+        if _is_final_attempt(job):
+            remove_job_file(file_path)
+        
         error_result = {
             "job_id": job_id,
             "status": "failed",
@@ -1,10 +1,14 @@
 """Job queue management with BullMQ"""
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, BinaryIO
 import json
 import asyncio
+import base64
+import os
+import shutil
+from collections import OrderedDict
 from urllib.parse import urlparse
 from ..config import settings
-from .processor import process_analysis_job
+from .processor import process_analysis_job, remove_job_file
 
 # Try to import BullMQ, fallback to simple queue if not available
 try:
@@ -19,9 +23,15 @@ queue: Optional[Any] = None
 worker: Optional[Any] = None
 queue_events: Optional[Any] = None
 
+# Number of jobs processed concurrently
+QUEUE_CONCURRENCY = 5
+
 # Simple in-memory queue fallback
-_in_memory_queue: list = []
-_in_memory_processing: Dict[str, Any] = {}
+_in_memory_queue: "asyncio.Queue[Dict[str, Any]]" = asyncio.Queue()
+# Job statuses, oldest-updated first; bounded so finished jobs don't pile up
+_in_memory_processing: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_IN_MEMORY_STATUS_MAX = 10000
+_in_memory_workers: List["asyncio.Task[None]"] = []
 
 async def init_queue():
     """Initialize job queue and worker"""
@@ -43,7 +53,7 @@ async def init_queue():
             "analysis",
             process_analysis_job,
             connection=connection,
-            concurrency=5,  # Process 5 jobs concurrently
+            concurrency=QUEUE_CONCURRENCY,
         )
         
         # Create queue events for monitoring
@@ -52,8 +62,11 @@ async def init_queue():
         print("✅ Job queue initialized (BullMQ)")
     else:
         print("✅ Job queue initialized (in-memory fallback)")
-        # Start background processor
-        asyncio.create_task(_process_queue_background())
+        # Start background processors
+        _in_memory_workers.extend(
+            asyncio.create_task(_process_queue_background())
+            for _ in range(QUEUE_CONCURRENCY)
+        )
 
 async def close_queue():
     """Close queue connections"""
@@ -66,41 +79,91 @@ async def close_queue():
             await queue.close()
         if queue_events:
             await queue_events.close()
+    else:
+        for task in _in_memory_workers:
+            task.cancel()
+        # Let in-flight jobs unwind before shared resources are closed
+        await asyncio.gather(*_in_memory_workers, return_exceptions=True)
+        _in_memory_workers.clear()
+        
+        # Pending jobs don't survive a restart; reclaim their stored uploads
+        while not _in_memory_queue.empty():
+            job_data = _in_memory_queue.get_nowait()
+            remove_job_file(job_data.get("file_path"))
+            _in_memory_queue.task_done()
     
     print("✅ Job queue closed")
 
+def _set_job_status(job_id: str, job_status: Dict[str, Any]):
+    """Record an in-memory job status, evicting the least recently updated"""
+    _in_memory_processing[job_id] = job_status
+    _in_memory_processing.move_to_end(job_id)
+    while len(_in_memory_processing) > _IN_MEMORY_STATUS_MAX:
+        _in_memory_processing.popitem(last=False)
+
 async def _process_queue_background():
     """Background processor for in-memory queue"""
     while True:
-        if _in_memory_queue:
-            job_data = _in_memory_queue.pop(0)
-            job_id = job_data["job_id"]
-            _in_memory_processing[job_id] = {"status": "processing"}
-            try:
-                await process_analysis_job({"data": job_data})
-                _in_memory_processing[job_id] = {"status": "completed"}
-            except Exception as e:
-                _in_memory_processing[job_id] = {"status": "failed", "error": str(e)}
-        await asyncio.sleep(1)
+        job_data = await _in_memory_queue.get()
+        job_id = job_data["job_id"]
+        _set_job_status(job_id, {"status": "processing"})
+        try:
+            await process_analysis_job({"data": job_data})
+            _set_job_status(job_id, {"status": "completed"})
+        except Exception as e:
+            _set_job_status(job_id, {"status": "failed", "error": str(e)})
+        finally:
+            # The in-memory queue never retries, so the upload is done with
+            remove_job_file(job_data.get("file_path"))
+            _in_memory_queue.task_done()
+
+def _job_file_path(job_id: str) -> str:
+    """Path of a job's uploaded file in job storage"""
+    os.makedirs(settings.JOB_STORAGE_DIR, exist_ok=True)
+    return os.path.join(settings.JOB_STORAGE_DIR, f"{job_id}.pdf")
+
+async def save_job_upload(job_id: str, source: BinaryIO) -> str:
+    """Copy an uploaded file object into job storage in chunks and return its path"""
+    def _copy() -> str:
+        path = _job_file_path(job_id)
+        try:
+            with open(path, "wb") as dest:
+                shutil.copyfileobj(source, dest)
+        except OSError:
+            # Don't leave a partially written file behind
+            remove_job_file(path)
+            raise
+        return path
+    
+    return await asyncio.to_thread(_copy)
 
 async def add_analysis_job(
     job_id: str,
-    file_content: bytes,
     filename: str,
+    file_path: Optional[str] = None,
+    file_content: Optional[bytes] = None,
     webhook_url: Optional[str] = None,
     options: Dict[str, Any] = None,
     api_key: str = None,
 ):
-    """Add an analysis job to the queue"""
+    """Add an analysis job to the queue (file already in job storage, or raw content to inline)"""
     job_data = {
         "job_id": job_id,
         "filename": filename,
-        "file_content": file_content.hex(),  # Store as hex string
         "webhook_url": webhook_url,
         "options": options or {},
         "api_key": api_key,
     }
     
+    # Pass the file by path so only a reference goes through the queue;
+    # content is only given when job storage already failed, so inline it
+    if file_path is not None:
+        job_data["file_path"] = file_path
+    else:
+        # Encode in a worker thread so large files don't stall the event loop
+        encoded = await asyncio.to_thread(base64.b64encode, file_content)
+        job_data["file_content"] = encoded.decode("ascii")
+    
     if BULLMQ_AVAILABLE and queue:
         await queue.add(
             "analyze",
@@ -114,8 +177,8 @@ async def add_analysis_job(
         )
     else:
         # Use in-memory queue
-        _in_memory_queue.append(job_data)
-        _in_memory_processing[job_id] = {"status": "pending"}
+        _set_job_status(job_id, {"status": "pending"})
+        await _in_memory_queue.put(job_data)
     
     return job_id
 
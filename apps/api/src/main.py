@@ -4,28 +4,40 @@ FastAPI service for external integrations (Email, Slack, Zapier, etc.)
 """
 from fastapi import FastAPI, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from contextlib import asynccontextmanager
+from fastapi.responses import ORJSONResponse
+from contextlib import asynccontextmanager, suppress
+import asyncio
+import ssl
 import uvicorn
 from .config import settings
-from .auth.middleware import api_key_middleware
+from .auth.middleware import AuthMiddleware, SKIP_PATHS
+from .auth.api_keys import run_last_used_flusher
 from .endpoints import analyze, jobs, webhooks, health
 from .jobs.queue import init_queue, close_queue
+from .http_client import init_http_client, close_http_client
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Startup and shutdown events"""
     # Startup
+    print(f"✅ Crypto backend: {ssl.OPENSSL_VERSION}")
+    await init_http_client()
     await init_queue()
+    last_used_flusher = asyncio.create_task(run_last_used_flusher())
     yield
     # Shutdown
+    last_used_flusher.cancel()
+    with suppress(asyncio.CancelledError):
+        await last_used_flusher  # runs the final flush
     await close_queue()
+    await close_http_client()
 
 app = FastAPI(
     title="Aegis AI Integration API",
     description="API for document analysis and risk assessment",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # CORS middleware
@@ -38,7 +50,7 @@ app.add_middleware(
 )
 
 # API key authentication middleware
-app.middleware("http")(api_key_middleware)
+app.add_middleware(AuthMiddleware, skip=SKIP_PATHS)
 
 # Include routers
 app.include_router(health.router, tags=["Health"])
@@ -49,7 +61,7 @@ app.include_router(webhooks.router, prefix="/api/v1", tags=["Webhooks"])
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "error": "Internal server error",
@@ -1,19 +1,21 @@
 """Webhook delivery system"""
-import httpx
 import hmac
-import hashlib
-import json
+import orjson
 import asyncio
+import random
 from datetime import datetime
 from typing import Dict, Any, Optional
 from ..config import settings
+from ..http_client import get_http_client
+
+# One-shot OpenSSL HMAC: hashing happens in a single C call
+_hmac_digest = hmac.digest
 
 async def deliver_webhook(
     webhook_url: str,
     event: str,
     data: Dict[str, Any],
     secret: Optional[str] = None,
-    retry_count: int = 0,
 ) -> bool:
     """
     Deliver a webhook with retry logic and signature verification.
@@ -23,9 +25,12 @@ async def deliver_webhook(
     payload = {
         "event": event,
         "data": data,
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": datetime.utcnow(),  # orjson emits ISO 8601 natively
     }
     
+    # Serialize once; the same bytes are signed and sent as the body
+    payload_bytes = orjson.dumps(payload, option=orjson.OPT_SORT_KEYS)
+    
     # Generate signature if secret provided
     headers = {
         "Content-Type": "application/json",
@@ -33,49 +38,36 @@ async def deliver_webhook(
     }
     
     if secret:
-        signature = generate_signature(payload, secret)
+        signature = generate_signature(payload_bytes, secret.encode())
         headers["X-Aegis-Signature"] = f"sha256={signature}"
     
-    try:
-        async with httpx.AsyncClient(timeout=settings.WEBHOOK_TIMEOUT) as client:
+    client = get_http_client()
+    for attempt in range(settings.WEBHOOK_MAX_RETRIES + 1):
+        try:
             response = await client.post(
                 webhook_url,
-                json=payload,
+                content=payload_bytes,
                 headers=headers,
+                timeout=settings.WEBHOOK_TIMEOUT,
             )
-            
             if response.status_code in [200, 201, 202]:
                 return True
-            else:
-                # Retry on failure
-                if retry_count < settings.WEBHOOK_MAX_RETRIES:
-                    await asyncio.sleep(settings.WEBHOOK_RETRY_DELAY * (retry_count + 1))
-                    return await deliver_webhook(
-                        webhook_url, event, data, secret, retry_count + 1
-                    )
-                return False
-                
-    except Exception as e:
-        print(f"Webhook delivery error: {e}")
-        # Retry on exception
-        if retry_count < settings.WEBHOOK_MAX_RETRIES:
-            await asyncio.sleep(settings.WEBHOOK_RETRY_DELAY * (retry_count + 1))
-            return await deliver_webhook(
-                webhook_url, event, data, secret, retry_count + 1
-            )
-        return False
+        except Exception as e:
+            print(f"Webhook delivery error: {e}")
+        
+        # Retry with jittered exponential backoff
+        if attempt < settings.WEBHOOK_MAX_RETRIES:
+            delay = min(settings.WEBHOOK_RETRY_MAX_DELAY, settings.WEBHOOK_RETRY_DELAY * 2 ** attempt)
+            await asyncio.sleep(delay * random.random())
+    
+    return False
 
-def generate_signature(payload: Dict[str, Any], secret: str) -> str:
-    """Generate HMAC signature for webhook payload"""
-    payload_str = json.dumps(payload, sort_keys=True)
-    signature = hmac.new(
-        secret.encode(),
-        payload_str.encode(),
-        hashlib.sha256,
-    ).hexdigest()
+def generate_signature(payload: bytes, secret: bytes) -> str:
+    """Generate HMAC signature for serialized webhook payload"""
+    signature = _hmac_digest(secret, payload, "sha256").hex()
     return signature
 
-def verify_signature(payload: Dict[str, Any], signature: str, secret: str) -> bool:
+def verify_signature(payload: bytes, signature: str, secret: bytes) -> bool:
     """Verify webhook signature"""
     expected = generate_signature(payload, secret)
     return hmac.compare_digest(signature, expected)